@@ -6,11 +6,33 @@ except ImportError:
 
 from dateutil.rrule import * # TODO only what we need ...
 from dateutil.relativedelta import relativedelta
+from dateutil import tz as dateutil_tz
 
 from datetime import date, datetime, timedelta
 import time
 import math
 import calendar
+import os
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+from collections import deque, namedtuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+try:
+    import zoneinfo
+except ImportError:
+    # Python < 3.9 - fall back on dateutil.tz for time zone names
+    zoneinfo = None
+
+# ColumnarIntervals relies on memoryview.cast and array.frombytes (Python 3.3+)
+_COLUMNAR_SUPPORTED = hasattr(memoryview, 'cast')
 
 # TODO placeholder so we can prepare to localize strings until we actually localize strings
 # ref: https://docs.python.org/2/library/gettext.html
@@ -50,6 +72,35 @@ class IntervalResult(dict):
         self.is_partial = is_partial
 
 
+    @classmethod
+    def from_ordinals(cls, begins, ends, partials):
+        """
+        Trusted bulk constructor: build IntervalResult objects from parallel sequences of begin ordinals, end ordinals
+        (as returned by date.toordinal()) and is_partial flags.
+        Unlike the property setters, no validation is done, so each begin must come on or before its end.
+
+        Returns
+        -------
+        list of IntervalResult objects
+        """
+        timestamps = {}
+        def timestamp(ordinal):
+            if(ordinal not in timestamps):
+                timestamps[ordinal] = time.mktime(date.fromordinal(ordinal).timetuple())
+            return timestamps[ordinal]
+
+        results = []
+        for begin, end, is_partial in zip(begins, ends, partials):
+            result = cls.__new__(cls)
+            # same key order as the property setters produce
+            dict.__init__(result, end_date=timestamp(end), begin_date=timestamp(begin), is_partial=bool(is_partial))
+            results.append(result)
+        return results
+
+    def __reduce__(self):
+        """ Compact pickling: just the raw stored values, restored without going through the validating setters """
+        return (_restore_interval_result, (type(self), dict.get(self, 'begin_date'), dict.get(self, 'end_date'), dict.get(self, 'is_partial')))
+
     def __my_properties(self):
         """ Gets a list of @property-defined properties for the current class only (no super) """
         return [k for k,v in self.__class__.__dict__.items() if type(v) is property]
@@ -129,6 +180,12 @@ class IntervalResult(dict):
             raise TypeError(_("is_partial must be of type bool. Provided type is " + str(type(is_partial))))
         self['is_partial'] = is_partial
 
+def _restore_interval_result(cls, begin_date, end_date, is_partial):
+    """ Unpickle an IntervalResult from the raw values stored by IntervalResult.__reduce__ """
+    result = cls.__new__(cls)
+    dict.__init__(result, end_date=end_date, begin_date=begin_date, is_partial=is_partial)
+    return result
+
 def last_day_of_month(any_day):
     """
     Given a datetime (or date) object, return the last day in the given month. Handles leap years as well.
@@ -147,7 +204,18 @@ def last_day_of_month(any_day):
     next_month = any_day.replace(day=28) + timedelta(days=4)  # this will never fail
     return next_month - timedelta(days=next_month.day)
 
-def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False):
+def _week_start(week_start):
+    """
+    Resolve and validate a week_start argument.
+    None falls back to the process-global calendar.firstweekday(), read once per call.
+    """
+    if(week_start is None):
+        return calendar.firstweekday()
+    if(not isinstance(week_start, int) or isinstance(week_start, bool) or not (calendar.MONDAY <= week_start <= calendar.SUNDAY)):
+        raise ValueError(_("week_start must be an int from 0 (Monday) to 6 (Sunday). Provided value is " + str(week_start)))
+    return week_start
+
+def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule'):
     """
     Generate a non-overlapping set of date intervals from begin_date to end_date
 
@@ -161,7 +229,7 @@ def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed
         If a datetime is provided, only the date portion will be used.
     interval intervalgenerator.intervals
         Duration that each time interval should span.
-        Note that WEEK uses the current calendar.firstweekday setting, which defaults to 0 (Monday) for fixed weekly increments.
+        Note that fixed WEEK intervals start on week_start.
         If an invalid or unsupported interval is provided, @raise NotImplementedError
     interval_count int, optional
         Number of intervals to include in each IntervalResult, e.g. 2 --> a 2-year span if interval is intervals.YEAR.
@@ -173,11 +241,40 @@ def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed
         A relative interval calculates the interval based on the begin_date, e.g. if begin_date is February 1, 2013
         and interval is intervals.YEAR then each interval will start on February 1 of each year.
         Only the last interval may be partial.
+    week_start int, optional
+        First day of the week for fixed WEEK intervals, from 0 (calendar.MONDAY) to 6 (calendar.SUNDAY).
+        Defaults to None, which uses the current calendar.firstweekday setting (itself defaulting to Monday).
+        Pass it explicitly to avoid depending on process-global calendar state, e.g. from multiple threads.
+    engine string, optional
+        How the intervals are computed. Defaults to 'rrule'.
+        'rrule' is the dateutil.rrule reference implementation.
+        'fast' computes the same intervals with calendar arithmetic on date ordinals.
+        'verify' runs both and raises RuntimeError if they disagree in any way.
+        If an unknown engine is provided, @raise ValueError
 
     Returns
     -------
     Sequentially-ordered list of IntervalResult objects
     """
+    # the generator guarantees valid, ordered ranges, so build the results in bulk without per-object validation
+    return IntervalResult.from_ordinals(*_intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine))
+
+def _intervalordinals(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule'):
+    """
+    Generate the intervals of intervalgenerator as parallel lists of begin ordinals, end ordinals and is_partial flags,
+    using the requested engine. Takes the same parameters as intervalgenerator.
+    """
+    if(engine == 'rrule'):
+        return _rruleintervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start)
+    if(engine == 'fast'):
+        return _fastintervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start)
+    if(engine == 'verify'):
+        return _verifiedintervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start)
+    raise ValueError(_("engine must be one of 'rrule', 'fast' or 'verify'. Provided engine is " + str(engine)))
+
+def _rruleintervalordinals(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None):
+    """ Reference engine for _intervalordinals, based on dateutil.rrule """
+    week_start = _week_start(week_start)
 
     # used to normalize and validate the requested range
     overall_interval = IntervalResult()
@@ -185,24 +282,29 @@ def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed
     overall_interval.end_date = end_date
     original_interval = interval
 
+    # only the date portion is used
+    begin_date = _to_date(begin_date)
+    end_date = _to_date(end_date)
+
     day_before = begin_date - timedelta(days=1)
 
     rrule_param = None
-    return_results = []
+    begins = []
+    ends = []
+    partials = []
 
     if(interval == intervals.YEAR):
         rrule_param = YEARLY
 
         if(is_fixed and (begin_date.day != 1 or begin_date.month != 1)):
             # set the first interval
-            new_interval = IntervalResult()
-            new_interval.begin_date = begin_date
-            new_interval.end_date = date((begin_date.year + interval_count - 1), 12, 31)
-            new_interval.is_partial = True
-            return_results.append(new_interval)
+            first_end_date = date((begin_date.year + interval_count - 1), 12, 31)
+            begins.append(begin_date.toordinal())
+            ends.append(first_end_date.toordinal())
+            partials.append(True)
 
             # reset begin date to beginning of next year and let 'normal' handling take over
-            begin_date = new_interval.end_date + timedelta(days=1)
+            begin_date = first_end_date + timedelta(days=1)
 
 
     if(interval == intervals.DAY):
@@ -212,15 +314,10 @@ def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed
     if(interval == intervals.PART):
         if(interval_count == 1):
             # just return the original date range
-            new_interval = IntervalResult()
-            new_interval.begin_date = begin_date
-            new_interval.end_date = end_date
-            new_interval.is_partial = False
-            return [new_interval]
+            return [begin_date.toordinal()], [end_date.toordinal()], [False]
 
         # have to calculate the length of each part
-        # TODO make sure that time parts are ignored in the comparison for total days
-        total_days = (overall_interval.end_date - overall_interval.begin_date).days + 1
+        total_days = (end_date - begin_date).days + 1
         new_interval_count = int(math.floor(total_days * 1.0 / interval_count))
         if(new_interval_count >= 1): # no partial days
             # convert it into a DAILY rrule
@@ -236,81 +333,1174 @@ def intervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed
 
     if(interval == intervals.WEEK):
         rrule_param = WEEKLY
-        if(is_fixed and begin_date.weekday() != calendar.firstweekday()):
+        if(is_fixed and begin_date.weekday() != week_start):
             # set the first interval
-            days_to_end_of_week = (7 - calendar.firstweekday() - begin_date.weekday()) - 1
-            new_interval = IntervalResult()
-            new_interval.begin_date = begin_date
-            new_interval.end_date = begin_date + relativedelta(days=(days_to_end_of_week)) + relativedelta(days=(7*(interval_count -1)))
-            new_interval.is_partial = True
-            return_results.append(new_interval)
+            days_to_end_of_week = (week_start - begin_date.weekday() - 1) % 7
+            first_end_date = begin_date + relativedelta(days=(days_to_end_of_week)) + relativedelta(days=(7*(interval_count -1)))
+            begins.append(begin_date.toordinal())
+            ends.append(first_end_date.toordinal())
+            partials.append(True)
             # reset begin date to beginning of next week and let 'normal' handling take over
-            begin_date = new_interval.end_date + timedelta(days=1)
+            begin_date = first_end_date + timedelta(days=1)
 
     if(interval == intervals.MONTH):
         rrule_param = MONTHLY
         if(is_fixed and begin_date.day > 1):
             # set the first interval
-            new_interval = IntervalResult()
-            new_interval.begin_date = begin_date
-            new_interval.end_date = last_day_of_month(begin_date + relativedelta(months=(interval_count-1)))
-            new_interval.is_partial = True
-            return_results.append(new_interval)
+            first_end_date = last_day_of_month(begin_date + relativedelta(months=(interval_count-1)))
+            begins.append(begin_date.toordinal())
+            ends.append(first_end_date.toordinal())
+            partials.append(True)
 
             # reset begin date to beginning of next month and let 'normal' handling take over
-            begin_date = new_interval.end_date + timedelta(days=1)
+            begin_date = first_end_date + timedelta(days=1)
 
         # have to do a different formulation for monthly - to handle recurrence on e.g. the 31st of the month
         if(begin_date.day > 28):
             last_day = last_day_of_month(begin_date)
             offset_from_last_day = ((last_day - begin_date).days + 1) * -1 # multiply by negative 1 to tell rrule to go backwards from the last day; add one because -1 means use the last day
 
-            interval_begin_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=begin_date, until=end_date, bysetpos=1, bymonthday=(begin_date.day, offset_from_last_day)))
-            interval_end_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=day_before, bysetpos=1, bymonthday=(day_before.day, offset_from_last_day - 1), count=(len(interval_begin_dates) + 1)))
+            interval_begin_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=begin_date, until=end_date, bysetpos=1, bymonthday=(begin_date.day, offset_from_last_day)))
+            interval_end_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=day_before, bysetpos=1, bymonthday=(day_before.day, offset_from_last_day - 1), count=(len(interval_begin_dates) + 1)))
         elif(begin_date.day == 1): # day_before day depends on month
-            interval_begin_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=begin_date, until=end_date))
-            interval_end_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=day_before, bysetpos=1, bymonthday=(day_before.day, -1), count=(len(interval_begin_dates) + 1)))
+            interval_begin_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=begin_date, until=end_date))
+            interval_end_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=day_before, bysetpos=1, bymonthday=(day_before.day, -1), count=(len(interval_begin_dates) + 1)))
         else:
-            interval_begin_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=begin_date, until=end_date))
-            interval_end_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=day_before, count=(len(interval_begin_dates) + 1)))
+            interval_begin_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=begin_date, until=end_date))
+            interval_end_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=day_before, count=(len(interval_begin_dates) + 1)))
 
 
     elif(rrule_param is None):
         # interval not in supported intervals
         raise NotImplementedError
     else:
-        interval_begin_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=begin_date, until=end_date))
-        interval_end_dates = list(rrule(rrule_param, cache=False, interval=interval_count, dtstart=day_before, count=(len(interval_begin_dates) + 1)))
+        interval_begin_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=begin_date, until=end_date))
+        interval_end_dates = list(rrule(rrule_param, cache=False, wkst=week_start, interval=interval_count, dtstart=day_before, count=(len(interval_begin_dates) + 1)))
+
+    if(not interval_begin_dates):
+        return begins, ends, partials
+
+    interval_begins = [d.toordinal() for d in interval_begin_dates]
+    begins.extend(interval_begins)
+    ends.extend(b - 1 for b in interval_begins[1:]) # day before the next interval begins
+    partials.extend([False] * (len(interval_begins) - 1))
+
+    last_end_date = end_date # overall end date
+    ends.append(last_end_date.toordinal())
+
+    if(is_fixed and interval == intervals.MONTH):
+        is_partial = (last_end_date != last_day_of_month(last_end_date))
+
+        if(original_interval == intervals.QUARTER and
+            (last_end_date.month, last_end_date.day) not in ((3, 31), (6, 30), (9, 30), (12, 31))):
+
+            is_partial = True
+    elif(is_fixed and interval == intervals.WEEK):
+        is_partial = (last_end_date.weekday() != (week_start - 1) % 7)
+
+    else:
+        is_partial = (last_end_date != interval_end_dates[len(interval_begins)].date())
+    partials.append(is_partial)
+
+    return begins, ends, partials
+
+def _fastintervalordinals(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None):
+    """
+    Arithmetic engine for _intervalordinals: the same intervals as the rrule engine (including its is_partial rules),
+    computed directly from date ordinals and calendar arithmetic.
+    """
+    week_start = _week_start(week_start)
+
+    # used to normalize and validate the requested range
+    overall_interval = IntervalResult()
+    overall_interval.begin_date = begin_date
+    overall_interval.end_date = end_date
+    original_interval = interval
+
+    # only the date portion is used
+    begin_date = _to_date(begin_date)
+    end_date = _to_date(end_date)
+    day_before = begin_date - timedelta(days=1)
+
+    begins = []
+    ends = []
+    partials = []
+
+    if(interval == intervals.PART):
+        if(interval_count == 1):
+            # just return the original date range
+            return [begin_date.toordinal()], [end_date.toordinal()], [False]
+
+        part_days = ((end_date - begin_date).days + 1) // interval_count
+        if(part_days < 1):
+            # partial days are not supported
+            raise NotImplementedError
+        interval = intervals.DAY
+        interval_count = part_days
+
+    if(interval == intervals.QUARTER):
+        interval_count = interval_count * 3
+        interval = intervals.MONTH
+
+    first_end_date = None
+    if(is_fixed and interval == intervals.YEAR and (begin_date.day != 1 or begin_date.month != 1)):
+        first_end_date = date((begin_date.year + interval_count - 1), 12, 31)
+    elif(is_fixed and interval == intervals.WEEK and begin_date.weekday() != week_start):
+        first_end_date = begin_date + timedelta(days=((week_start - begin_date.weekday() - 1) % 7 + 7*(interval_count - 1)))
+    elif(is_fixed and interval == intervals.MONTH and begin_date.day > 1):
+        first_end_date = last_day_of_month(begin_date + relativedelta(months=(interval_count-1)))
+    if(first_end_date is not None):
+        # set the first interval, then reset begin date to the beginning of the next one
+        begins.append(begin_date.toordinal())
+        ends.append(first_end_date.toordinal())
+        partials.append(True)
+        begin_date = first_end_date + timedelta(days=1)
+
+    if(begin_date > end_date):
+        return begins, ends, partials
+    first_ordinal = begin_date.toordinal()
+    last_ordinal = end_date.toordinal()
+
+    if(interval in (intervals.DAY, intervals.WEEK)):
+        step = interval_count if interval == intervals.DAY else 7 * interval_count
+        interval_begins = list(range(first_ordinal, last_ordinal + 1, step))
+        natural_end = day_before.toordinal() + len(interval_begins) * step
+
+    elif(interval == intervals.MONTH):
+        months = (end_date.year - begin_date.year) * 12 + end_date.month - begin_date.month
+        steps = months // interval_count
+        if(_monthly_occurrence(begin_date, steps * interval_count) > end_date):
+            steps -= 1
+        interval_begins = [_monthly_occurrence(begin_date, k * interval_count).toordinal() for k in range(steps + 1)]
+
+        # the day before the next interval would begin, following the rrule formulation for end dates
+        months = len(interval_begins) * interval_count
+        if(begin_date.day > 28):
+            from_last_day = calendar.monthrange(begin_date.year, begin_date.month)[1] - begin_date.day + 1
+            natural_end = _monthly_occurrence(day_before, months, from_last_day).toordinal()
+        elif(begin_date.day == 1):
+            natural_end = _monthly_occurrence(day_before, months, 0).toordinal()
+        else:
+            natural_end = _monthly_occurrence(day_before, months).toordinal()
+
+    elif(interval == intervals.YEAR):
+        interval_begins = [d.toordinal() for d in _yearly_occurrences(begin_date, interval_count, end_date=end_date)]
+        natural_end = _yearly_occurrences(day_before, interval_count, count=(len(interval_begins) + 1))[-1].toordinal()
+
+    else:
+        # interval not in supported intervals
+        raise NotImplementedError
+
+    begins.extend(interval_begins)
+    ends.extend(b - 1 for b in interval_begins[1:]) # day before the next interval begins
+    partials.extend([False] * (len(interval_begins) - 1))
+    ends.append(last_ordinal)
+
+    if(is_fixed and interval == intervals.MONTH):
+        is_partial = (end_date != last_day_of_month(end_date))
+        if(original_interval == intervals.QUARTER and (end_date.month, end_date.day) not in ((3, 31), (6, 30), (9, 30), (12, 31))):
+            is_partial = True
+    elif(is_fixed and interval == intervals.WEEK):
+        is_partial = (end_date.weekday() != (week_start - 1) % 7)
+    else:
+        is_partial = (last_ordinal != natural_end)
+    partials.append(is_partial)
+
+    return begins, ends, partials
+
+def _yearly_occurrences(begin_date, interval_count, end_date=None, count=None):
+    """
+    Get the dates of the yearly recurrence starting on begin_date, every interval_count years, up to and including end_date
+    or until count dates are found. Like rrule, a recurrence starting on February 29 only falls in leap years.
+    """
+    if(begin_date.month != 2 or begin_date.day != 29):
+        if(count is None):
+            count = (end_date.year - begin_date.year) // interval_count + 1
+            if(begin_date.replace(year=(begin_date.year + (count - 1) * interval_count)) > end_date):
+                count -= 1
+        return [begin_date.replace(year=(begin_date.year + k * interval_count)) for k in range(count)]
+
+    occurrences = []
+    year = begin_date.year
+    while(count is None or len(occurrences) < count):
+        if(calendar.isleap(year)):
+            occurrence = date(year, 2, 29)
+            if(end_date is not None and occurrence > end_date):
+                break
+            occurrences.append(occurrence)
+        elif(end_date is not None and year > end_date.year):
+            break
+        year += interval_count
+    return occurrences
+
+def _verifiedintervalordinals(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None):
+    """
+    Verification engine for _intervalordinals: runs both the rrule and the fast engine and @raise RuntimeError on any mismatch,
+    including one engine raising an exception the other does not. Returns the rrule engine's results (or raises its exception).
+    """
+    outcomes = []
+    for engine in (_rruleintervalordinals, _fastintervalordinals):
+        try:
+            outcomes.append(engine(begin_date, end_date, interval, interval_count, is_fixed, week_start))
+        except Exception as e:
+            outcomes.append(e)
+    expected, actual = outcomes
+
+    if(isinstance(expected, Exception) or isinstance(actual, Exception)):
+        if(type(expected) is not type(actual)):
+            raise RuntimeError(_("Engine mismatch for " + str((begin_date, end_date, interval, interval_count, is_fixed, week_start)) +
+                ": rrule engine gave " + repr(expected) + ", fast engine gave " + repr(actual)))
+        raise expected
+
+    if(expected != actual):
+        raise RuntimeError(_("Engine mismatch for " + str((begin_date, end_date, interval, interval_count, is_fixed, week_start)) +
+            ": rrule engine gave " + str(expected) + ", fast engine gave " + str(actual)))
+    return expected
+
+def _to_date(any_day):
+    """ Strip the time portion from a datetime, leaving dates untouched """
+    if isinstance(any_day, datetime):
+        return any_day.date()
+    return any_day
+
+def _interval_delta(interval, interval_count):
+    """
+    Get the relativedelta spanned by interval_count intervals of the given type.
+    If an invalid or unsupported interval is provided (including PART, which has no fixed length), @raise NotImplementedError
+    """
+    if(interval == intervals.YEAR):
+        return relativedelta(years=interval_count)
+    if(interval == intervals.QUARTER):
+        return relativedelta(months=(interval_count * 3))
+    if(interval == intervals.MONTH):
+        return relativedelta(months=interval_count)
+    if(interval == intervals.WEEK):
+        return relativedelta(weeks=interval_count)
+    if(interval == intervals.DAY):
+        return relativedelta(days=interval_count)
+    raise NotImplementedError
+
+def _fixed_interval_start(any_day, interval, week_start=calendar.MONDAY):
+    """ Get the first day of the calendar interval (year, quarter, month, week or day) containing any_day """
+    if(interval == intervals.YEAR):
+        return date(any_day.year, 1, 1)
+    if(interval == intervals.QUARTER):
+        return date(any_day.year, ((any_day.month - 1) // 3) * 3 + 1, 1)
+    if(interval == intervals.MONTH):
+        return date(any_day.year, any_day.month, 1)
+    if(interval == intervals.WEEK):
+        return any_day - timedelta(days=((any_day.weekday() - week_start) % 7))
+    if(interval == intervals.DAY):
+        return any_day
+    raise NotImplementedError
+
+def lastintervalgenerator(end_date, count, interval, interval_count=1, is_fixed=False, week_start=None):
+    """
+    Generate exactly count non-overlapping date intervals ending on end_date, walking backward from end_date.
+    Useful for e.g. "the last 13 fixed months ending today" without guessing a begin date.
+
+    Parameters
+    ----------
+    end_date date or datetime
+        Inclusive end date (anchor) of the last interval.
+        If a datetime is provided, only the date portion will be used.
+    count int
+        Number of IntervalResult objects to generate.
+    interval intervalgenerator.intervals
+        Duration that each time interval should span.
+        PART is not supported since it requires a begin date, @raise NotImplementedError
+    interval_count int, optional
+        Number of intervals to include in each IntervalResult. Defaults to 1. If less than 1, @raise ValueError
+    is_fixed boolean, optional
+        Whether the interval should be fixed (true) or relative (false). Defaults to false.
+        A fixed interval takes complete calendar intervals; only the last interval may be partial
+        (when end_date is not the last day of its interval).
+        A relative interval calculates the interval backward from end_date, so no interval is partial.
+    week_start int, optional
+        First day of the week for fixed WEEK intervals. Same as intervalgenerator.
+
+    Returns
+    -------
+    Sequentially-ordered list of IntervalResult objects
+    """
+    if(count < 0):
+        raise ValueError(_("count must not be negative. Provided count is " + str(count)))
+    if(interval_count < 1):
+        raise ValueError(_("interval_count must be at least 1. Provided interval_count is " + str(interval_count)))
+
+    week_start = _week_start(week_start)
+    end_date = _to_date(end_date)
+    delta = _interval_delta(interval, interval_count)
+
+    if(is_fixed):
+        # the last interval starts interval_count - 1 calendar intervals before the one containing end_date
+        period_start = _fixed_interval_start(end_date, interval, week_start)
+        period_end = period_start + _interval_delta(interval, 1) - timedelta(days=1)
+        last_is_partial = (end_date != period_end)
+        anchor = period_start - _interval_delta(interval, interval_count - 1) + delta
+    else:
+        last_is_partial = False
+        anchor = end_date + timedelta(days=1)
+
+    if(count == 0):
+        return []
+
+    # always step from the anchor (rather than from the previous boundary) so month-end clipping doesn't drift
+    boundaries = [(anchor - (delta * k)).toordinal() for k in range(count, -1, -1)]
+    ends = [b - 1 for b in boundaries[1:]]
+    ends[-1] = end_date.toordinal()
+    partials = [False] * (count - 1) + [last_is_partial]
+
+    return IntervalResult.from_ordinals(boundaries[:-1], ends, partials)
+
+def _monthly_occurrence(begin_date, months, from_last_day=None):
+    """
+    Get the date on which the relative monthly recurrence starting on begin_date falls, the given number of months later.
+    Mirrors the rrule formulation used by intervalgenerator, including the bysetpos handling for days after the 28th.
+
+    Parameters
+    ----------
+    from_last_day int, optional
+        Number of days before the last day of the month to fall back on (rrule's negative bymonthday) if it comes earlier.
+        Defaults to begin_date's own distance from the end of its month for days after the 28th, and no fallback otherwise.
+    """
+    month_index = begin_date.month - 1 + months
+    year = begin_date.year + month_index // 12
+    month = month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+
+    day = begin_date.day
+    if(from_last_day is None and day > 28):
+        from_last_day = calendar.monthrange(begin_date.year, begin_date.month)[1] - day
+    if(from_last_day is not None):
+        # earliest of the same day or the same offset from the end of the month
+        day = min(day, last_day - from_last_day) if day <= last_day else last_day - from_last_day
+    return date(year, month, day)
+
+def _count_leap_years(first_year, last_year, step):
+    """ Count the leap years in first_year, first_year + step, ... up to and including last_year """
+    if(last_year < first_year):
+        return 0
+    steps = (last_year - first_year) // step + 1
+
+    # the leap year pattern repeats every 400 years (so every 400 steps), so count one cycle and the remainder
+    full_cycles, remainder = divmod(steps, 400)
+    per_cycle = sum(1 for k in range(400) if calendar.isleap(first_year + k * step)) if full_cycles else 0
+    return full_cycles * per_cycle + sum(1 for k in range(remainder) if calendar.isleap(first_year + k * step))
+
+def count_intervals(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None):
+    """
+    Count the intervals intervalgenerator would produce for the same arguments, without generating them.
+    Computed from calendar arithmetic in constant time, so it is cheap even for e.g. DAY over centuries.
+
+    Parameters
+    ----------
+    Same as intervalgenerator.
+    If an invalid or unsupported interval is provided, @raise NotImplementedError
+
+    Returns
+    -------
+    Number of IntervalResult objects intervalgenerator would return
+    """
+
+    week_start = _week_start(week_start)
+
+    # used to normalize and validate the requested range
+    overall_interval = IntervalResult()
+    overall_interval.begin_date = begin_date
+    overall_interval.end_date = end_date
+
+    begin_date = _to_date(begin_date)
+    end_date = _to_date(end_date)
+    total_days = (end_date - begin_date).days + 1
+    count = 0
+
+    if(interval == intervals.PART):
+        if(interval_count == 1):
+            return 1
+        part_days = total_days // interval_count
+        if(part_days < 1):
+            # intervalgenerator does not support parts shorter than a day
+            raise NotImplementedError
+        return (total_days - 1) // part_days + 1
+
+    if(interval == intervals.DAY):
+        return (total_days - 1) // interval_count + 1
+
+    if(interval == intervals.QUARTER):
+        interval_count = interval_count * 3
+        interval = intervals.MONTH
+
+    if(interval == intervals.WEEK):
+        if(is_fixed and begin_date.weekday() != week_start):
+            # leading partial interval
+            count = 1
+            days_to_end_of_week = (week_start - begin_date.weekday() - 1) % 7
+            begin_date = begin_date + timedelta(days=(days_to_end_of_week + 7*(interval_count - 1) + 1))
+        if(begin_date > end_date):
+            return count
+        return count + (end_date - begin_date).days // (7 * interval_count) + 1
+
+    if(interval == intervals.MONTH):
+        if(is_fixed and begin_date.day > 1):
+            # leading partial interval
+            count = 1
+            begin_date = last_day_of_month(begin_date + relativedelta(months=(interval_count-1))) + timedelta(days=1)
+        if(begin_date > end_date):
+            return count
+        months = (end_date.year - begin_date.year) * 12 + end_date.month - begin_date.month
+        steps = months // interval_count
+        if(_monthly_occurrence(begin_date, steps * interval_count) > end_date):
+            steps -= 1
+        return count + steps + 1
+
+    if(interval == intervals.YEAR):
+        if(is_fixed and (begin_date.day != 1 or begin_date.month != 1)):
+            # leading partial interval
+            count = 1
+            begin_date = date(begin_date.year + interval_count, 1, 1)
+        if(begin_date > end_date):
+            return count
+        if(begin_date.month == 2 and begin_date.day == 29):
+            # rrule only recurs on February 29 in leap years
+            last_year = end_date.year if (end_date.month, end_date.day) >= (2, 29) else end_date.year - 1
+            return count + _count_leap_years(begin_date.year, last_year, interval_count)
+        steps = (end_date.year - begin_date.year) // interval_count
+        if(begin_date.replace(year=(begin_date.year + steps * interval_count)) > end_date):
+            steps -= 1
+        return count + steps + 1
+
+    # interval not in supported intervals
+    raise NotImplementedError
+
+def _interval_boundary(begin_date, interval, index, is_fixed=False, week_start=calendar.MONDAY):
+    """
+    Get the first day of the index-th single interval counting from begin_date (index 0 is begin_date itself).
+    Fixed boundaries after the first fall on calendar intervals; relative monthly and yearly boundaries follow intervalgenerator's recurrence.
+    """
+    if(index == 0):
+        return begin_date
+    if(is_fixed):
+        return _fixed_interval_start(begin_date, interval, week_start) + _interval_delta(interval, index)
+    if(interval == intervals.MONTH):
+        return _monthly_occurrence(begin_date, index)
+    if(interval == intervals.QUARTER):
+        return _monthly_occurrence(begin_date, index * 3)
+    if(interval == intervals.YEAR):
+        # a recurrence starting on February 29 only falls in leap years
+        return _yearly_occurrences(begin_date, 1, count=(index + 1))[-1]
+    return begin_date + _interval_delta(interval, index)
+
+def windowintervalgenerator(begin_date, end_date, interval, window_count, step_count=1, is_fixed=False, week_start=None):
+    """
+    Generate a (possibly overlapping) set of sliding date windows from begin_date to end_date in a single streaming pass,
+    e.g. a 30-day window every day is window_count=30, step_count=1 for intervals.DAY.
+
+    Parameters
+    ----------
+    begin_date date or datetime
+        Inclusive start date of the first window.
+        If a datetime is provided, only the date portion will be used.
+    end_date date or datetime
+        Inclusive end date of the last window.
+        If a datetime is provided, only the date portion will be used.
+    interval intervalgenerator.intervals
+        Unit in which window_count and step_count are expressed.
+        PART is not supported, @raise NotImplementedError
+    window_count int
+        Number of intervals spanned by each window.
+    step_count int, optional
+        Number of intervals between the beginnings of consecutive windows. Defaults to 1.
+        A step_count equal to window_count yields the same intervals as intervalgenerator. For fixed windows this holds
+        for the boundaries, but is_partial only ever flags the first window and a window cut short by end_date.
+        Like intervalgenerator, relative YEAR windows from February 29 recur only in leap years, so each year of a window
+        is one leap-year occurrence; for multi-year windows this differs from intervalgenerator, which skips the
+        non-leap multiples of interval_count instead.
+    is_fixed boolean, optional
+        Whether window boundaries fall on calendar intervals (true) or are relative to begin_date (false). Defaults to false.
+        With fixed intervals the first window is partial if begin_date does not start a calendar interval.
+        As in intervalgenerator, fixed QUARTER windows are spans of 3 calendar months starting with begin_date's month.
+        In either case the window reaching end_date is cut off there (and is partial if cut short) and ends the sequence.
+    week_start int, optional
+        First day of the week for fixed WEEK windows. Same as intervalgenerator.
+
+    Returns
+    -------
+    Generator of sequentially-ordered IntervalResult objects
+    """
+
+    # used to normalize and validate the requested range
+    overall_interval = IntervalResult()
+    overall_interval.begin_date = begin_date
+    overall_interval.end_date = end_date
+
+    if(window_count < 1 or step_count < 1):
+        raise ValueError(_("window_count and step_count must be at least 1. Provided values are " + str(window_count) + " and " + str(step_count)))
+
+    if(interval == intervals.QUARTER):
+        # like intervalgenerator, quarters are spans of 3 months, so fixed quarters start on any month rather than calendar quarters
+        window_count = window_count * 3
+        step_count = step_count * 3
+        interval = intervals.MONTH
+
+    week_start = _week_start(week_start)
+    begin_date = _to_date(begin_date)
+    end_date = _to_date(end_date)
+    first_is_partial = is_fixed and begin_date != _fixed_interval_start(begin_date, interval, week_start)
+
+    # boundaries[0] is the boundary at index offset; each boundary is computed once and shared by every window using it
+    boundaries = deque()
+    offset = 0
+    start = 0
+    while True:
+        while(offset < start and boundaries):
+            boundaries.popleft()
+            offset += 1
+        offset = max(offset, start)
+        while(offset + len(boundaries) <= start + window_count):
+            boundaries.append(_interval_boundary(begin_date, interval, offset + len(boundaries), is_fixed, week_start))
+
+        window_begin = boundaries[0]
+        if(window_begin > end_date):
+            return
+        window_end = boundaries[window_count] - timedelta(days=1)
 
-    for i, i_begin_date in enumerate(interval_begin_dates):
         new_interval = IntervalResult()
-        new_interval.begin_date = i_begin_date
+        new_interval.begin_date = window_begin
+        if(window_end >= end_date):
+            new_interval.end_date = end_date
+            new_interval.is_partial = (first_is_partial and start == 0) or window_end != end_date
+            yield new_interval
+            return
+
+        new_interval.end_date = window_end
+        new_interval.is_partial = (first_is_partial and start == 0)
+        yield new_interval
+        start += step_count
+
+def pandasintervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule', as_index=False):
+    """
+    Generate the same intervals as intervalgenerator directly as pandas objects, built from ordinal arrays in one
+    vectorized step rather than row by row from IntervalResult objects.
+    Requires the optional pandas dependency (pip install python-date-interval-generator[pandas]), @raise ImportError otherwise
+
+    Parameters
+    ----------
+    Same as intervalgenerator, plus:
+    as_index boolean, optional
+        Whether to return a pandas.IntervalIndex closed on both sides (true) instead of a DataFrame (false). Defaults to false.
+
+    Returns
+    -------
+    pandas.DataFrame with begin_date, end_date and is_partial columns, or a pandas.IntervalIndex (without is_partial)
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        raise ImportError(_("pandasintervalgenerator requires pandas. Install it with: pip install python-date-interval-generator[pandas]"))
+
+    begins, ends, partials = _intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine)
+
+    # days since the unix epoch are exactly what datetime64[D] stores
+    epoch = date(1970, 1, 1).toordinal()
+    begin_dates = (np.array(begins, dtype=np.int64) - epoch).astype('datetime64[D]')
+    end_dates = (np.array(ends, dtype=np.int64) - epoch).astype('datetime64[D]')
+
+    if(as_index):
+        return pd.IntervalIndex.from_arrays(pd.DatetimeIndex(begin_dates), pd.DatetimeIndex(end_dates), closed='both')
+    return pd.DataFrame({
+        'begin_date': pd.DatetimeIndex(begin_dates),
+        'end_date': pd.DatetimeIndex(end_dates),
+        'is_partial': np.array(partials, dtype=bool),
+    }, columns=['begin_date', 'end_date', 'is_partial'])
+
+def _first_week_ordinal(year, week_start):
+    """ Get the ordinal of the first day of week 1 of year, for weeks starting on week_start: like ISO week 1, the week containing January 4 """
+    january_4 = date(year, 1, 4).toordinal()
+    return january_4 - (date.fromordinal(january_4).weekday() - week_start) % 7
+
+def encode_interval_keys(ordinals, interval, week_start=None):
+    """
+    Encode interval begin dates (as date.toordinal() ordinals) into compact, sortable integer keys for the given interval type,
+    e.g. for partition names or join keys:
+        YEAR: YYYY, QUARTER: YYYYQ, MONTH: YYYYMM, WEEK: YYYYWW, DAY and PART: YYYYMMDD
+    A key identifies the calendar interval containing the date, so e.g. a partial first interval gets its period's key.
+    Weeks start on week_start (see intervalgenerator) and are numbered like ISO weeks: week 1 is the one containing January 4,
+    so Monday weeks get their ISO week keys.
+    If an invalid or unsupported interval is provided, @raise NotImplementedError
+
+    Returns
+    -------
+    list of int keys, in the same order as ordinals
+    """
+    fromordinal = date.fromordinal
+    if(interval == intervals.YEAR):
+        return [fromordinal(o).year for o in ordinals]
+    if(interval == intervals.QUARTER):
+        return [d.year * 10 + (d.month + 2) // 3 for d in map(fromordinal, ordinals)]
+    if(interval == intervals.MONTH):
+        return [d.year * 100 + d.month for d in map(fromordinal, ordinals)]
+    if(interval == intervals.WEEK):
+        week_start = _week_start(week_start)
+        if(week_start == calendar.MONDAY):
+            return [iso[0] * 100 + iso[1] for iso in (fromordinal(o).isocalendar() for o in ordinals)]
+        keys = []
+        for o in ordinals:
+            start = o - (fromordinal(o).weekday() - week_start) % 7
+            start_date = fromordinal(start)
+            # the week belongs to the year of its fourth day
+            year = start_date.year + (1 if(start_date.month == 12 and start_date.day >= 29) else 0)
+            keys.append(year * 100 + (start - _first_week_ordinal(year, week_start)) // 7 + 1)
+        return keys
+    if(interval in (intervals.DAY, intervals.PART)):
+        return [d.year * 10000 + d.month * 100 + d.day for d in map(fromordinal, ordinals)]
+    raise NotImplementedError
+
+def decode_interval_keys(keys, interval, week_start=None):
+    """
+    Decode integer keys from encode_interval_keys back into ordinals of the first day of each keyed calendar interval
+    (the week_start day of weeks, so pass the week_start the keys were encoded with).
+    If an invalid or unsupported interval is provided, @raise NotImplementedError
+
+    Returns
+    -------
+    list of date.toordinal() ordinals, in the same order as keys
+    """
+    if(interval == intervals.YEAR):
+        return [date(k, 1, 1).toordinal() for k in keys]
+    if(interval == intervals.QUARTER):
+        return [date(k // 10, (k % 10) * 3 - 2, 1).toordinal() for k in keys]
+    if(interval == intervals.MONTH):
+        return [date(k // 100, k % 100, 1).toordinal() for k in keys]
+    if(interval == intervals.WEEK):
+        week_start = _week_start(week_start)
+        return [_first_week_ordinal(k // 100, week_start) + (k % 100 - 1) * 7 for k in keys]
+    if(interval in (intervals.DAY, intervals.PART)):
+        return [date(k // 10000, k // 100 % 100, k % 100).toordinal() for k in keys]
+    raise NotImplementedError
+
+def intervalkeygenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule'):
+    """
+    Generate the integer key (see encode_interval_keys) of each interval intervalgenerator would return for the same arguments,
+    computed directly from ordinals without building IntervalResult objects.
+
+    Returns
+    -------
+    Sequentially-ordered list of int keys
+    """
+    begins = _intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine)[0]
+    return encode_interval_keys(begins, interval, week_start)
+
+# an int64 count, then int32 begin ordinals, int32 end ordinals and uint8 is_partial flags, all in native byte order
+_COLUMNAR_HEADER = struct.Struct('=q')
 
-        next_interval_i = i+1
-        if(next_interval_i < len(interval_begin_dates)): # all but the last one
-            new_interval.end_date = (interval_begin_dates[next_interval_i] - timedelta(days=1)) # day before the next interval begins
-            new_interval.is_partial = False
+class ColumnarIntervals(object):
+    """
+    Intervals stored column-wise in one contiguous buffer instead of as one Python object per interval:
+    an int64 count followed by int32 begin ordinals, int32 end ordinals (as returned by date.toordinal())
+    and uint8 is_partial flags, in native byte order.
+    begins, ends and partials are memoryviews on the buffer, usable wherever the buffer protocol is,
+    e.g. array.array('i').frombytes(columnar.begins.cast('B')) or numpy.frombuffer(columnar.begins, dtype='int32').
+    Requires Python 3.3+ (memoryview.cast), @raise NotImplementedError otherwise.
+    """
+
+    def __init__(self, buffer):
+        """
+        Wrap a buffer in the columnar layout (e.g. bytes, bytearray, array.array, mmap.mmap) without copying it.
+        If the buffer is shorter than its header says, e.g. a truncated file, @raise ValueError
+        """
+        if(not _COLUMNAR_SUPPORTED):
+            raise NotImplementedError(_("ColumnarIntervals requires memoryview.cast (Python 3.3+)"))
+
+        self.buffer = buffer
+        buffer_view = memoryview(buffer)
+        view = buffer_view.cast('B')
+        offset = _COLUMNAR_HEADER.size
+        count = _COLUMNAR_HEADER.unpack_from(view, 0)[0] if(len(view) >= offset) else -1
+        self.nbytes = offset + 9 * count
+        if(count < 0 or len(view) < self.nbytes):
+            length = len(view)
+            # release the views so that the buffer can still be closed, e.g. a memory-mapped file
+            view.release()
+            buffer_view.release()
+            raise ValueError(_("Buffer of " + str(length) + " bytes is too short for its columnar header and intervals"))
+
+        columns = [view[offset:(offset + 4 * count)], view[(offset + 4 * count):(offset + 8 * count)], view[(offset + 8 * count):self.nbytes]]
+        self.begins = columns[0].cast('i')
+        self.ends = columns[1].cast('i')
+        self.partials = columns[2].cast('B')
+        self._views = [self.begins, self.ends, self.partials] + columns + [buffer_view, view]
+
+    @classmethod
+    def from_ordinals(cls, begins, ends, partials):
+        """ Pack parallel sequences of begin ordinals, end ordinals and is_partial flags into a new array.array('B') buffer """
+        if(not _COLUMNAR_SUPPORTED):
+            raise NotImplementedError(_("ColumnarIntervals requires memoryview.cast (Python 3.3+)"))
+
+        buffer = array('B', _COLUMNAR_HEADER.pack(len(begins)))
+        buffer.frombytes(memoryview(array('i', begins)).cast('B'))
+        buffer.frombytes(memoryview(array('i', ends)).cast('B'))
+        buffer.frombytes(array('B', [1 if p else 0 for p in partials]))
+        return cls(buffer)
+
+    @classmethod
+    def fromfile(cls, f):
+        """
+        Memory-map a file written by tofile, read-only and without copying.
+        Call close() when done to unmap it. If the file is empty or truncated, @raise ValueError
+        """
+        if(os.fstat(f.fileno()).st_size == 0):
+            # mmap cannot map an empty file
+            raise ValueError(_("Cannot read ColumnarIntervals from an empty file"))
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapping)
+        except ValueError:
+            mapping.close()
+            raise
+
+    def tofile(self, f):
+        """ Write the whole buffer to a binary file object, e.g. for fromfile, in one call """
+        if(isinstance(self.buffer, array)):
+            self.buffer.tofile(f)
         else:
-            new_interval.end_date = end_date # overall end date
+            f.write(self._views[-1][:self.nbytes])
+
+    def __len__(self):
+        return len(self.begins)
 
-            if(is_fixed and interval == intervals.MONTH):
-                new_interval.is_partial = (new_interval.end_date != last_day_of_month(new_interval.end_date))
+    def __enter__(self):
+        return self
 
-                if(original_interval == intervals.QUARTER and
-                    new_interval.end_date != datetime(new_interval.end_date.year, 3, 31) and
-                    new_interval.end_date != datetime(new_interval.end_date.year, 6, 30) and
-                    new_interval.end_date != datetime(new_interval.end_date.year, 9, 30) and
-                    new_interval.end_date != datetime(new_interval.end_date.year, 12, 31)):
+    def __exit__(self, *args):
+        self.close()
 
-                    new_interval.is_partial = True
-            elif(is_fixed and interval == intervals.WEEK):
-                new_interval.is_partial = (new_interval.end_date.weekday() != 6)
+    def results(self):
+        """ Build IntervalResult objects (via the trusted IntervalResult.from_ordinals) """
+        return IntervalResult.from_ordinals(self.begins, self.ends, self.partials)
+
+    def close(self):
+        """ Release the views on the buffer (closing it if it is memory-mapped). The views are no longer usable afterwards. """
+        for view in self._views:
+            view.release()
+        if(isinstance(self.buffer, mmap.mmap)):
+            self.buffer.close()
+
+def columnarintervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule'):
+    """
+    Generate the same intervals as intervalgenerator as ColumnarIntervals, without building IntervalResult objects
+    and without any dependency beyond the standard library. Takes the same parameters as intervalgenerator.
 
-            else:
-                # print "(" + str(new_interval.end_date) + ", " + str(interval_end_dates[next_interval_i]) + ") -- " + str(new_interval.end_date != interval_end_dates[next_interval_i])
-                # print interval_end_dates
-                new_interval.is_partial = (new_interval.end_date != interval_end_dates[next_interval_i])
+    Returns
+    -------
+    ColumnarIntervals
+    """
+    return ColumnarIntervals.from_ordinals(*_intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine))
+
+def share_intervals(begins, ends, partials):
+    """
+    Write interval begin ordinals, end ordinals and is_partial flags into a new multiprocessing.shared_memory block
+    in the ColumnarIntervals layout, e.g. from a multiprocessing worker.
+    The block outlives this call; hand its name to the reading process, which attaches with SharedIntervals(name) and unlinks it.
+    Requires Python 3.8+ and POSIX shared memory, @raise NotImplementedError otherwise: Windows frees a block as soon as
+    its last handle closes, i.e. when this call returns.
 
-        return_results.append(new_interval)
+    Returns
+    -------
+    name of the shared memory block
+    """
+    if(shared_memory is None):
+        raise NotImplementedError(_("share_intervals requires multiprocessing.shared_memory (Python 3.8+)"))
+    if(os.name == 'nt'):
+        raise NotImplementedError(_("share_intervals requires POSIX shared memory, which outlives its handles"))
+
+    buffer = ColumnarIntervals.from_ordinals(begins, ends, partials).buffer
+    block = shared_memory.SharedMemory(create=True, size=len(buffer))
+    block.buf[:len(buffer)] = buffer
+    block.close()
+    return block.name
+
+def sharedintervalgenerator(begin_date, end_date, interval, interval_count=1, is_fixed=False, week_start=None, engine='rrule'):
+    """
+    Generate the same intervals as intervalgenerator straight into shared memory (see share_intervals),
+    without building IntervalResult objects. Takes the same parameters as intervalgenerator.
+
+    Returns
+    -------
+    name of the shared memory block, to attach with SharedIntervals(name)
+    """
+    return share_intervals(*_intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine))
 
-    return return_results
+class SharedIntervals(ColumnarIntervals):
+    """
+    ColumnarIntervals written by share_intervals, attached by shared memory block name without copying or re-validating.
+    Use as a context manager (or call close()) to detach, and call unlink() once no process needs the block anymore.
+    """
+
+    def __init__(self, name):
+        if(shared_memory is None):
+            raise NotImplementedError(_("SharedIntervals requires multiprocessing.shared_memory (Python 3.8+)"))
+
+        self._block = shared_memory.SharedMemory(name=name)
+        super(SharedIntervals, self).__init__(self._block.buf)
+
+    def close(self):
+        """ Detach from the shared memory block. The views are no longer usable afterwards. """
+        super(SharedIntervals, self).close()
+        self._block.close()
+
+    def unlink(self):
+        """ Free the shared memory block. Call once, after every process is done with it. """
+        self._block.unlink()
+
+def plan_batches(results, max_days=None, max_intervals=None, max_cost=None, cost=None):
+    """
+    Greedily coalesce a stream of consecutive intervals (e.g. from intervalgenerator or windowintervalgenerator)
+    into batches, for instance to turn many small intervals into fewer backfill jobs.
+    A batch is extended with the next interval as long as every given cap still holds; batches always start and end
+    on interval boundaries, and a single interval exceeding a cap becomes a batch of its own.
+    Runs in a single streaming pass.
+
+    Parameters
+    ----------
+    results iterable of IntervalResult
+        Sequentially-ordered intervals to coalesce.
+    max_days int, optional
+        Maximum number of days from the begin_date of a batch's first interval to the end_date of its last interval, inclusive.
+    max_intervals int, optional
+        Maximum number of intervals per batch.
+    max_cost number, optional
+        Maximum sum of cost(interval) over the intervals of a batch. Requires cost.
+    cost function, optional
+        Gets the cost of one IntervalResult, e.g. the expected number of rows to backfill.
+    At least one cap must be provided, @raise ValueError otherwise
+
+    Returns
+    -------
+    Generator of batches, each a list of consecutive IntervalResult objects
+    """
+    if(max_days is None and max_intervals is None and max_cost is None):
+        raise ValueError(_("At least one of max_days, max_intervals or max_cost must be provided"))
+    if(max_cost is not None and cost is None):
+        raise ValueError(_("cost must be provided along with max_cost"))
+
+    batch = []
+    batch_begin = None
+    batch_cost = 0
+    for result in results:
+        begin_date = result.begin_date
+        end_date = result.end_date
+        result_cost = cost(result) if cost is not None else 0
+
+        if(batch):
+            fits = ((max_intervals is None or len(batch) < max_intervals) and
+                (max_days is None or (end_date - batch_begin).days + 1 <= max_days) and
+                (max_cost is None or batch_cost + result_cost <= max_cost))
+            if(not fits):
+                yield batch
+                batch = []
+
+        if(not batch):
+            batch_begin = begin_date
+            batch_cost = 0
+        batch.append(result)
+        batch_cost += result_cost
+
+    if(batch):
+        yield batch
+
+ZonedInterval = namedtuple('ZonedInterval', ['begin', 'end', 'is_partial'])
+"""
+A time zone-aware interval from zonedintervalgenerator.
+begin is the midnight starting the interval's first day and end the midnight ending its last day, both aware datetimes,
+so consecutive intervals share a boundary.
+"""
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=dateutil_tz.UTC)
+
+# time zone -> (first ordinal, last ordinal, transition ordinals, UTC offsets in seconds of midnight from each transition on)
+_zone_offset_tables = {}
+
+def _zone(tz):
+    """ Resolve a time zone name (e.g. 'America/New_York') or tzinfo object, @raise ValueError for unknown names """
+    if(not isinstance(tz, str)):
+        return tz
+    if(zoneinfo is not None):
+        try:
+            return zoneinfo.ZoneInfo(tz)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            pass
+    else:
+        zone = dateutil_tz.gettz(tz)
+        if(zone is not None):
+            return zone
+    raise ValueError(_("Unknown time zone " + tz))
+
+def _midnight_offset(zone, ordinal):
+    """ Get the UTC offset in seconds of the midnight starting the given day in zone """
+    offset = datetime.fromordinal(ordinal).replace(tzinfo=zone).utcoffset()
+    return offset.days * 86400 + offset.seconds
+
+def _zone_offset_table(zone, first_ordinal, last_ordinal):
+    """
+    Get the cached table of midnight UTC offsets for zone covering first_ordinal to last_ordinal, (re)building it if needed.
+    The table is built by probing one midnight a week and bisecting to the exact day of each offset change,
+    so offset changes that revert within a week may be missed.
+    """
+    table = _zone_offset_tables.get(zone)
+    if(table is not None):
+        if(table[0] <= first_ordinal and last_ordinal <= table[1]):
+            return table
+        first_ordinal = min(first_ordinal, table[0])
+        last_ordinal = max(last_ordinal, table[1])
+
+    ordinals = [first_ordinal]
+    offsets = [_midnight_offset(zone, first_ordinal)]
+    previous = first_ordinal
+    for probe in list(range(first_ordinal + 7, last_ordinal, 7)) + [last_ordinal]:
+        offset = _midnight_offset(zone, probe)
+        while(offset != offsets[-1]):
+            # find the first day after the last known change whose offset differs
+            low, high = max(previous, ordinals[-1]), probe
+            while(high - low > 1):
+                middle = (low + high) // 2
+                if(_midnight_offset(zone, middle) == offsets[-1]):
+                    low = middle
+                else:
+                    high = middle
+            ordinals.append(high)
+            offsets.append(_midnight_offset(zone, high))
+        previous = probe
+
+    # replaced as a whole, so concurrent readers always see a complete table
+    table = (first_ordinal, last_ordinal, ordinals, offsets)
+    _zone_offset_tables[zone] = table
+    return table
+
+def zonedintervalgenerator(begin_date, end_date, interval, tz, interval_count=1, is_fixed=False, week_start=None, engine='rrule', utc=False):
+    """
+    Generate the same intervals as intervalgenerator with boundaries at midnight in the given time zone,
+    independent of the host time zone and without day boundaries shifting on daylight saving time transition days.
+
+    Parameters
+    ----------
+    Same as intervalgenerator, plus:
+    tz string or tzinfo
+        Time zone whose midnights are the interval boundaries, e.g. 'America/New_York' or a zoneinfo.ZoneInfo.
+        If an unknown time zone name is provided, @raise ValueError
+    utc boolean, optional
+        Whether to return boundaries as aware UTC datetimes (true) or aware datetimes in tz (false). Defaults to false.
+        UTC boundaries are converted with a per-zone table of UTC offset changes, cached across calls,
+        instead of a time zone calculation per boundary.
+
+    Returns
+    -------
+    Sequentially-ordered list of ZonedInterval(begin, end, is_partial) named tuples
+    """
+    zone = _zone(tz)
+    begins, ends, partials = _intervalordinals(begin_date, end_date, interval, interval_count, is_fixed, week_start, engine)
+    if(not begins):
+        return []
+
+    boundaries = {}
+    if(utc):
+        first_ordinal, last_ordinal, transitions, offsets = _zone_offset_table(zone, begins[0], ends[-1] + 1)
+        for ordinal in set(begins).union(e + 1 for e in ends):
+            offset = offsets[bisect_right(transitions, ordinal) - 1]
+            boundaries[ordinal] = _EPOCH_UTC + timedelta(days=(ordinal - _EPOCH_ORDINAL), seconds=-offset)
+    else:
+        for ordinal in set(begins).union(e + 1 for e in ends):
+            boundaries[ordinal] = datetime.fromordinal(ordinal).replace(tzinfo=zone)
+
+    return [ZonedInterval(boundaries[b], boundaries[e + 1], bool(p)) for b, e, p in zip(begins, ends, partials)]
+
+_RRULE_FREQUENCIES = {
+    'YEARLY': intervals.YEAR,
+    'MONTHLY': intervals.MONTH,
+    'WEEKLY': intervals.WEEK,
+    'DAILY': intervals.DAY,
+}
+_RRULE_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# rule string -> IntervalPlan
+_compiled_rrules = {}
+
+def _ordinal_or_none(occurrence, *args):
+    """ Get the ordinal of the date returned by occurrence(*args), or None if it falls past date.max """
+    try:
+        return occurrence(*args).toordinal()
+    except (OverflowError, ValueError):
+        return None
+
+class IntervalPlan(object):
+    """
+    An iCalendar (RFC 5545) RRULE compiled into contiguous intervals: each occurrence begins an interval that ends
+    the day before the next occurrence. Get one with compile_rrule, which caches plans by rule string.
+
+    Common rule shapes run on the fast arithmetic engine of intervalgenerator:
+        FREQ=YEARLY/MONTHLY/WEEKLY/DAILY with an optional INTERVAL recur relative to begin_date
+        (MONTHLY only for begin dates up to the 28th, as rrule skips months without the day),
+        FREQ=YEARLY;BYMONTH=1;BYMONTHDAY=1 (or BYYEARDAY=1), FREQ=MONTHLY;BYMONTHDAY=1 and FREQ=WEEKLY;BYDAY=<day>
+        recur on calendar years, months and weeks,
+        FREQ=MONTHLY;BYMONTHDAY=-1 with an optional INTERVAL recurs on month ends.
+    Any other rule falls back on dateutil.rrule.
+
+    Parameters
+    ----------
+    rule string
+        RRULE string, with or without the 'RRULE:' prefix. If it cannot be parsed or is not a single RRULE (e.g. has EXDATE lines), @raise ValueError
+    fast boolean, optional
+        Whether to use the fast engine for common shapes. Defaults to true; false always uses dateutil.rrule, e.g. to verify.
+    """
+
+    def __init__(self, rule, fast=True):
+        self.rule = rule
+        # parses (and validates) the rule once; generate() only swaps in the start date
+        self._rrule = rrulestr(rule, dtstart=datetime(1970, 1, 1))
+        if(not isinstance(self._rrule, rrule)):
+            # e.g. EXDATE or RDATE lines make an rruleset, whose occurrences are not a single recurrence
+            raise ValueError(_("Only a single RRULE is supported: " + repr(rule)))
+
+        self.interval = None
+        self.interval_count = 1
+        self.is_fixed = False
+        self.week_start = calendar.MONDAY
+        self.month_end = False
+
+        parts = dict(part.split('=', 1) for part in rule.upper().replace('RRULE:', '').split(';') if part)
+        frequency = _RRULE_FREQUENCIES.get(parts.pop('FREQ', None))
+        interval_count = int(parts.pop('INTERVAL', 1))
+        parts.pop('WKST', None) # irrelevant to every fast shape below
+
+        if(frequency is None or not fast):
+            return
+        if(not parts):
+            self.interval = frequency
+            self.interval_count = interval_count
+        elif(interval_count == 1 and (
+                (frequency == intervals.YEAR and parts in ({'BYMONTH': '1', 'BYMONTHDAY': '1'}, {'BYYEARDAY': '1'})) or
+                (frequency == intervals.MONTH and parts == {'BYMONTHDAY': '1'}) or
+                (frequency == intervals.WEEK and parts.get('BYDAY') in _RRULE_WEEKDAYS and len(parts) == 1))):
+            self.interval = frequency
+            self.is_fixed = True
+            if(frequency == intervals.WEEK):
+                self.week_start = _RRULE_WEEKDAYS.index(parts['BYDAY'])
+        elif(frequency == intervals.MONTH and parts == {'BYMONTHDAY': '-1'}):
+            self.interval = frequency
+            self.interval_count = interval_count
+            self.month_end = True
+
+    def __repr__(self):
+        return 'IntervalPlan(' + repr(self.rule) + ')'
+
+    def is_fast(self, begin_date):
+        """ Whether generating from begin_date runs on the fast arithmetic engine rather than dateutil.rrule """
+        if(self.interval is None):
+            return False
+        return self.is_fixed or self.month_end or self.interval != intervals.MONTH or begin_date.day <= 28
+
+    def _occurrences(self, begin_date, end_date):
+        """
+        Get the ordinals of the occurrences from begin_date to end_date, inclusive, and of the next one after end_date
+        (None if the recurrence ends before that).
+        """
+        if(self.month_end):
+            def occurrence(k):
+                month_index = begin_date.month - 1 + k * self.interval_count
+                year, month = begin_date.year + month_index // 12, month_index % 12 + 1
+                return date(year, month, calendar.monthrange(year, month)[1])
+
+            # the first occurrence is the end of begin_date's month
+            count = ((end_date.year - begin_date.year) * 12 + end_date.month - begin_date.month) // self.interval_count + 1
+            if(occurrence(count - 1) > end_date):
+                count -= 1
+            return [occurrence(k).toordinal() for k in range(count)], _ordinal_or_none(occurrence, count)
+
+        if(self.is_fast(begin_date)):
+            try:
+                begins, ends, partials = _fastintervalordinals(begin_date, end_date, self.interval, self.interval_count, self.is_fixed, self.week_start)
+            except (OverflowError, ValueError):
+                # the last interval runs past date.max; leave it to rrule
+                begins = None
+            if(begins is not None):
+                if(partials[0] and self.is_fixed):
+                    # the leading partial interval does not begin on an occurrence
+                    begins = begins[1:]
+                return begins, _ordinal_or_none(self._next_occurrence, begin_date, end_date, len(begins))
+
+        dtstart = datetime.combine(begin_date, datetime.min.time())
+        recurrence = self._rrule.replace(dtstart=dtstart)
+        until = datetime.combine(end_date, datetime.max.time())
+        occurrences = sorted(set(d.toordinal() for d in recurrence.between(dtstart, until, inc=True)))
+        next_occurrence = recurrence.after(until)
+        return occurrences, (next_occurrence.toordinal() if next_occurrence is not None else None)
+
+    def _next_occurrence(self, begin_date, end_date, count):
+        """ Get the date of the first fast-engine occurrence after end_date, given the count of occurrences up to it """
+        if(self.is_fixed):
+            return _fixed_interval_start(end_date, self.interval, self.week_start) + _interval_delta(self.interval, 1)
+        if(self.interval == intervals.MONTH):
+            return _monthly_occurrence(begin_date, count * self.interval_count)
+        if(self.interval == intervals.YEAR):
+            return _yearly_occurrences(begin_date, self.interval_count, count=(count + 1))[-1]
+        return begin_date + _interval_delta(self.interval, count * self.interval_count)
+
+    def ordinals(self, begin_date, end_date):
+        """
+        Generate the plan's intervals from begin_date to end_date as parallel lists of begin ordinals, end ordinals
+        and is_partial flags. An interval is partial unless it runs from one occurrence to the day before the next,
+        i.e. the leading interval before the first occurrence and a last interval cut short by end_date.
+        """
+        # used to normalize and validate the requested range
+        overall_interval = IntervalResult()
+        overall_interval.begin_date = begin_date
+        overall_interval.end_date = end_date
+
+        begin_date = _to_date(begin_date)
+        end_date = _to_date(end_date)
+        begins, next_occurrence = self._occurrences(begin_date, end_date)
+
+        partials = [False] * len(begins)
+        if(not begins or begins[0] > begin_date.toordinal()):
+            begins.insert(0, begin_date.toordinal())
+            partials.insert(0, True)
+        ends = [b - 1 for b in begins[1:]] # day before the next interval begins
+        ends.append(end_date.toordinal())
+        if(next_occurrence is None or ends[-1] != next_occurrence - 1):
+            partials[-1] = True
+
+        return begins, ends, partials
+
+    def generate(self, begin_date, end_date):
+        """
+        Generate the plan's intervals from begin_date to end_date (see ordinals).
+
+        Returns
+        -------
+        Sequentially-ordered list of IntervalResult objects
+        """
+        return IntervalResult.from_ordinals(*self.ordinals(begin_date, end_date))
+
+def compile_rrule(rule):
+    """
+    Compile an iCalendar RRULE string (e.g. 'FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=-1') into a reusable IntervalPlan,
+    cached by rule string. If the rule cannot be parsed, @raise ValueError
+    """
+    plan = _compiled_rrules.get(rule)
+    if(plan is None):
+        plan = IntervalPlan(rule)
+        _compiled_rrules[rule] = plan
+    return plan
+
+def rruleintervalgenerator(rule, begin_date, end_date):
+    """
+    Generate a contiguous set of date intervals from begin_date to end_date, each beginning on an occurrence of
+    the iCalendar RRULE string rule, which recurs from begin_date. See IntervalPlan for the is_partial rules.
+
+    Returns
+    -------
+    Sequentially-ordered list of IntervalResult objects
+    """
+    return compile_rrule(rule).generate(begin_date, end_date)
@@ -40,6 +40,7 @@ setup(
     extras_require={
         'dev': [],
         'test': [],
+        'pandas': ['pandas'],
     },
     test_suite="tests",
 )
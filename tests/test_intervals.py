@@ -1,9 +1,24 @@
 from unittest import TestCase
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 import json
+import os
+import pickle
+import multiprocessing
+import tempfile
+from array import array
 import pprint
+import random
+import threading
+import calendar
+import unittest
 
 from intervalgenerator.intervals import *
+import intervalgenerator.intervals as intervals_module
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
 
 class IntervalResultTest(TestCase):
     """ Testing all things related to the IntervalResult class """
@@ -94,13 +109,44 @@ class IntervalResultTest(TestCase):
             res['invalid_key'] = "hello"
         with self.assertRaises(AttributeError):
             # getter
-            print res['invalid_key']
+            print(res['invalid_key'])
+
+    def test_intervalresult_from_ordinals(self):
+        results = IntervalResult.from_ordinals(
+            [date(2016, 4, 2).toordinal(), date(2016, 5, 3).toordinal()],
+            [date(2016, 5, 2).toordinal(), date(2016, 5, 3).toordinal()],
+            [False, True])
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 4, 2), end_date=date(2016, 5, 2), is_partial=False),
+            IntervalResult(begin_date=date(2016, 5, 3), end_date=date(2016, 5, 3), is_partial=True),
+        ]
+        self.assertEqual(results, expected_results)
+        self.assertEqual(json.dumps(results), json.dumps(expected_results))
+        self.assertEqual(type(results[0].begin_date), datetime)
+        self.assertEqual(IntervalResult.from_ordinals([], [], []), [])
+
+        # setters on bulk-built results are still strict
+        with self.assertRaises(ValueError): results[0].end_date = date(2016, 4, 1)
+        with self.assertRaises(TypeError): results[0].is_partial = 1
+
+    def test_intervalresult_pickle(self):
+        res = IntervalResult(begin_date=datetime(2016, 4, 2, 5, 40), end_date=date(2016, 5, 2), is_partial=True)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(res, protocol))
+            self.assertEqual(type(restored), IntervalResult)
+            self.assertEqual(restored, res)
+            self.assertEqual(json.dumps(restored), json.dumps(res))
+            self.assertEqual(restored.begin_date, datetime(2016, 4, 2, 5, 40))
+
+        empty = pickle.loads(pickle.dumps(IntervalResult()))
+        self.assertEqual(empty.begin_date, None)
+        self.assertEqual(empty.is_partial, None)
 
 class IntervalsTest(TestCase):
     """ Testing all things related to the intervals class """
     def test_intervals_all_implemented(self):
-        begin_date = date(2016, 01, 01)
-        end_date = date(2016, 02, 29)
+        begin_date = date(2016, 1, 1)
+        end_date = date(2016, 2, 29)
         # actual begin date and end date doesn't matter here - only testing that they're all supported
         for i in intervals:
             try:
@@ -607,3 +653,573 @@ class IntervalGeneratorTest(TestCase):
 
             for e in expected_strings:
                 assert (e in self.tested_combinations[i]), e + " not tested (or failed test) for " + str(intervals(i))
+
+class LastIntervalGeneratorTest(TestCase):
+    """ Testing all things related to the lastintervalgenerator function """
+
+    def test_last_intervals_fixed(self):
+        results = lastintervalgenerator(date(2016, 4, 15), 3, intervals.MONTH, is_fixed=True)
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 2, 1), end_date=date(2016, 2, 29), is_partial=False),
+            IntervalResult(begin_date=date(2016, 3, 1), end_date=date(2016, 3, 31), is_partial=False),
+            IntervalResult(begin_date=date(2016, 4, 1), end_date=date(2016, 4, 15), is_partial=True),
+        ]
+        self.assertEqual(results, expected_results)
+
+        results = lastintervalgenerator(date(2015, 12, 31), 2, intervals.QUARTER, interval_count=2, is_fixed=True)
+        expected_results = [
+            IntervalResult(begin_date=date(2015, 1, 1), end_date=date(2015, 6, 30), is_partial=False),
+            IntervalResult(begin_date=date(2015, 7, 1), end_date=date(2015, 12, 31), is_partial=False),
+        ]
+        self.assertEqual(results, expected_results)
+
+    def test_last_intervals_relative(self):
+        results = lastintervalgenerator(datetime(2016, 3, 30, 12, 0), 3, intervals.MONTH)
+        expected_results = [
+            IntervalResult(begin_date=date(2015, 12, 31), end_date=date(2016, 1, 30), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 31), end_date=date(2016, 2, 28), is_partial=False),
+            IntervalResult(begin_date=date(2016, 2, 29), end_date=date(2016, 3, 30), is_partial=False),
+        ]
+        self.assertEqual(results, expected_results)
+
+        results = lastintervalgenerator(date(2016, 1, 30), 4, intervals.WEEK)
+        self.assertEqual(results, intervalgenerator(date(2016, 1, 3), date(2016, 1, 30), intervals.WEEK))
+
+    def test_last_intervals_match_forward(self):
+        for i in intervals:
+            if(i == intervals.PART):
+                with self.assertRaises(NotImplementedError):
+                    lastintervalgenerator(date(2016, 4, 15), 3, i)
+                continue
+            results = lastintervalgenerator(date(2016, 12, 31), 5, i, is_fixed=True)
+            forward = intervalgenerator(results[0].begin_date, date(2016, 12, 31), i, is_fixed=True)
+            self.assertEqual(results, forward, "Backward and forward results differ for " + str(i))
+
+        self.assertEqual(lastintervalgenerator(date(2016, 4, 15), 0, intervals.DAY), [])
+        for count, interval_count in [(-1, 1), (3, 0), (3, -1)]:
+            with self.assertRaises(ValueError):
+                lastintervalgenerator(date(2016, 4, 15), count, intervals.DAY, interval_count=interval_count)
+
+class CountIntervalsTest(TestCase):
+    """ Testing all things related to the count_intervals function """
+
+    def test_count_matches_generator(self):
+        rand = random.Random(26)
+        for _ in range(100):
+            begin_date = date(2011, 1, 1) + timedelta(days=rand.randrange(2000))
+            end_date = begin_date + timedelta(days=rand.randrange(1200))
+            interval_count = rand.randint(1, 4)
+            for i in intervals:
+                for is_fixed in (False, True):
+                    try:
+                        expected = len(intervalgenerator(begin_date, end_date, i, interval_count, is_fixed))
+                    except NotImplementedError:
+                        with self.assertRaises(NotImplementedError):
+                            count_intervals(begin_date, end_date, i, interval_count, is_fixed)
+                        continue
+                    self.assertEqual(count_intervals(begin_date, end_date, i, interval_count, is_fixed), expected,
+                        "Count differs for " + str((begin_date, end_date, i, interval_count, is_fixed)))
+
+        # only the date portion is used, as by intervalgenerator
+        for i in intervals:
+            self.assertEqual(count_intervals(datetime(2016, 1, 1, 12), datetime(2016, 1, 10, 6), i, 2),
+                len(intervalgenerator(datetime(2016, 1, 1, 12), datetime(2016, 1, 10, 6), i, 2)), str(i))
+        self.assertEqual(count_intervals(datetime(2016, 1, 1, 12), datetime(2016, 1, 10, 6), intervals.PART, 2), 2)
+
+    def test_count_leap_day(self):
+        for end_date in (date(2016, 2, 28), date(2016, 2, 29), date(2019, 12, 31)):
+            for interval_count in (1, 2, 3):
+                self.assertEqual(count_intervals(date(2000, 2, 29), end_date, intervals.YEAR, interval_count),
+                    len(intervalgenerator(date(2000, 2, 29), end_date, intervals.YEAR, interval_count)))
+
+    def test_count_large_range(self):
+        self.assertEqual(count_intervals(date(1901, 1, 1), date(2400, 12, 31), intervals.DAY), 500 * 365 + 122)
+        self.assertEqual(count_intervals(date(1901, 1, 1), date(2400, 12, 31), intervals.MONTH, is_fixed=True), 500 * 12)
+        with self.assertRaises(ValueError):
+            count_intervals(date(2016, 1, 2), date(2016, 1, 1), intervals.DAY)
+
+class WindowIntervalGeneratorTest(TestCase):
+    """ Testing all things related to the windowintervalgenerator function """
+
+    def test_windows_overlapping(self):
+        results = list(windowintervalgenerator(date(2016, 1, 1), date(2016, 1, 6), intervals.DAY, 3))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 1), end_date=date(2016, 1, 3), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 2), end_date=date(2016, 1, 4), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 3), end_date=date(2016, 1, 5), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 4), end_date=date(2016, 1, 6), is_partial=False),
+        ]
+        self.assertEqual(results, expected_results)
+
+        results = list(windowintervalgenerator(date(2016, 1, 15), date(2016, 5, 15), intervals.MONTH, 3, is_fixed=True))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 15), end_date=date(2016, 3, 31), is_partial=True),
+            IntervalResult(begin_date=date(2016, 2, 1), end_date=date(2016, 4, 30), is_partial=False),
+            IntervalResult(begin_date=date(2016, 3, 1), end_date=date(2016, 5, 15), is_partial=True),
+        ]
+        self.assertEqual(results, expected_results)
+
+    def test_windows_with_gaps(self):
+        results = list(windowintervalgenerator(date(2016, 1, 31), date(2016, 12, 31), intervals.MONTH, 1, step_count=4))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 31), end_date=date(2016, 2, 28), is_partial=False),
+            IntervalResult(begin_date=date(2016, 5, 31), end_date=date(2016, 6, 29), is_partial=False),
+            IntervalResult(begin_date=date(2016, 9, 30), end_date=date(2016, 10, 30), is_partial=False),
+        ]
+        self.assertEqual(results, expected_results)
+
+    def test_windows_match_generator(self):
+        for i in (intervals.YEAR, intervals.QUARTER, intervals.MONTH, intervals.WEEK, intervals.DAY):
+            for interval_count in (1, 2, 3):
+                self.assertEqual(list(windowintervalgenerator(date(2011, 1, 30), date(2015, 10, 31), i, interval_count, interval_count)),
+                    intervalgenerator(date(2011, 1, 30), date(2015, 10, 31), i, interval_count), "Windows differ for " + str(i))
+            self.assertEqual(list(windowintervalgenerator(date(2011, 1, 1), date(2015, 10, 31), i, 1, 1, is_fixed=True)),
+                intervalgenerator(date(2011, 1, 1), date(2015, 10, 31), i, is_fixed=True), "Fixed windows differ for " + str(i))
+            # relative yearly windows from February 29 only recur in leap years
+            self.assertEqual(list(windowintervalgenerator(date(2016, 2, 29), date(2025, 3, 5), i, 1, 1)),
+                intervalgenerator(date(2016, 2, 29), date(2025, 3, 5), i), "Windows from February 29 differ for " + str(i))
+            windows = windowintervalgenerator(date(2016, 2, 15), date(2018, 10, 31), i, 1, 1, is_fixed=True)
+            results = intervalgenerator(date(2016, 2, 15), date(2018, 10, 31), i, is_fixed=True)
+            self.assertEqual([(w.begin_date, w.end_date) for w in windows], [(r.begin_date, r.end_date) for r in results],
+                "Fixed window boundaries differ for " + str(i))
+
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 2, 29), end_date=date(2020, 2, 28), is_partial=False),
+            IntervalResult(begin_date=date(2020, 2, 29), end_date=date(2020, 3, 5), is_partial=True),
+        ]
+        self.assertEqual(list(windowintervalgenerator(date(2016, 2, 29), date(2020, 3, 5), intervals.YEAR, 1)), expected_results)
+
+        # fixed quarters span 3 months from begin_date's month, not calendar quarters
+        windows = list(windowintervalgenerator(date(2016, 2, 15), date(2016, 7, 31), intervals.QUARTER, 1, 1, is_fixed=True))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 2, 15), end_date=date(2016, 4, 30), is_partial=True),
+            IntervalResult(begin_date=date(2016, 5, 1), end_date=date(2016, 7, 31), is_partial=False),
+        ]
+        self.assertEqual(windows, expected_results)
+
+        with self.assertRaises(NotImplementedError):
+            list(windowintervalgenerator(date(2016, 1, 1), date(2016, 2, 1), intervals.PART, 2))
+        with self.assertRaises(ValueError):
+            list(windowintervalgenerator(date(2016, 1, 1), date(2016, 2, 1), intervals.DAY, 0))
+
+class WeekStartTest(TestCase):
+    """ Testing explicit week_start handling for intervals.WEEK """
+
+    def test_week_start_sunday(self):
+        results = intervalgenerator(date(2016, 1, 6), date(2016, 1, 20), intervals.WEEK, is_fixed=True, week_start=calendar.SUNDAY)
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 6), end_date=date(2016, 1, 9), is_partial=True),
+            IntervalResult(begin_date=date(2016, 1, 10), end_date=date(2016, 1, 16), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 17), end_date=date(2016, 1, 20), is_partial=True),
+        ]
+        self.assertEqual(results, expected_results)
+        self.assertEqual(count_intervals(date(2016, 1, 6), date(2016, 1, 20), intervals.WEEK, is_fixed=True, week_start=calendar.SUNDAY), 3)
+        self.assertEqual(lastintervalgenerator(date(2016, 1, 20), 3, intervals.WEEK, is_fixed=True, week_start=calendar.SUNDAY), [
+            IntervalResult(begin_date=date(2016, 1, 3), end_date=date(2016, 1, 9), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 10), end_date=date(2016, 1, 16), is_partial=False),
+            IntervalResult(begin_date=date(2016, 1, 17), end_date=date(2016, 1, 20), is_partial=True),
+        ])
+
+        with self.assertRaises(ValueError):
+            intervalgenerator(date(2016, 1, 6), date(2016, 1, 20), intervals.WEEK, week_start=7)
+
+    def test_week_start_ignores_global_calendar(self):
+        expected_results = intervalgenerator(date(2016, 1, 6), date(2016, 3, 20), intervals.WEEK, is_fixed=True, week_start=calendar.MONDAY)
+        original = calendar.firstweekday()
+        try:
+            calendar.setfirstweekday(calendar.SUNDAY)
+            results = intervalgenerator(date(2016, 1, 6), date(2016, 3, 20), intervals.WEEK, is_fixed=True, week_start=calendar.MONDAY)
+        finally:
+            calendar.setfirstweekday(original)
+        self.assertEqual(results, expected_results)
+
+    def test_week_start_threaded(self):
+        """ Reentrancy stress test: concurrent calls with explicit week starts are unaffected by each other or by the global calendar state """
+        calls = [(date(2015, 1, 1) + timedelta(days=d), week_start) for d in range(0, 56, 3) for week_start in range(7)]
+        expected = [intervalgenerator(b, date(2016, 12, 31), intervals.WEEK, is_fixed=True, week_start=w) for b, w in calls]
+
+        thread_count = 8
+        failures = []
+        def worker(offset):
+            for k in range(offset, len(calls), thread_count):
+                b, w = calls[k]
+                if(intervalgenerator(b, date(2016, 12, 31), intervals.WEEK, is_fixed=True, week_start=w) != expected[k]):
+                    failures.append(calls[k])
+
+        done = threading.Event()
+        def flip_first_weekday():
+            while(not done.is_set()):
+                calendar.setfirstweekday(random.randrange(7))
+
+        first_weekday = calendar.firstweekday()
+        flipper = threading.Thread(target=flip_first_weekday)
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(thread_count)]
+        flipper.start()
+        try:
+            for t in threads: t.start()
+            for t in threads: t.join()
+        finally:
+            done.set()
+            flipper.join()
+            calendar.setfirstweekday(first_weekday)
+
+        self.assertEqual(failures, [])
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class PandasIntervalGeneratorTest(TestCase):
+    """ Testing all things related to the optional pandas export """
+
+    def test_pandas_frame(self):
+        results = intervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.QUARTER, is_fixed=True)
+        frame = pandasintervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.QUARTER, is_fixed=True)
+
+        self.assertEqual(list(frame.columns), ['begin_date', 'end_date', 'is_partial'])
+        self.assertEqual(len(frame), len(results))
+        for row, result in zip(frame.itertuples(index=False), results):
+            self.assertEqual(row.begin_date.to_pydatetime(), result.begin_date)
+            self.assertEqual(row.end_date.to_pydatetime(), result.end_date)
+            self.assertEqual(bool(row.is_partial), result.is_partial)
+
+    def test_pandas_index(self):
+        index = pandasintervalgenerator(date(2016, 1, 1), date(2016, 3, 15), intervals.MONTH, as_index=True)
+        self.assertIsInstance(index, pandas.IntervalIndex)
+        self.assertEqual(index.closed, 'both')
+        self.assertEqual(len(index), 3)
+        self.assertTrue(pandas.Timestamp(2016, 1, 31) in index[0])
+        self.assertEqual(index[2].right, pandas.Timestamp(2016, 3, 15))
+
+class IntervalKeyTest(TestCase):
+    """ Testing all things related to integer interval keys """
+
+    def test_interval_keys(self):
+        self.assertEqual(intervalkeygenerator(date(2015, 11, 15), date(2016, 6, 30), intervals.QUARTER, is_fixed=True), [20154, 20161, 20162])
+        self.assertEqual(intervalkeygenerator(date(2016, 3, 1), date(2016, 5, 31), intervals.MONTH), [201603, 201604, 201605])
+        self.assertEqual(intervalkeygenerator(date(2016, 4, 4), date(2016, 4, 17), intervals.WEEK), [201614, 201615])
+        self.assertEqual(intervalkeygenerator(date(2016, 1, 1), date(2017, 1, 2), intervals.WEEK, is_fixed=True)[:2], [201553, 201601])
+        self.assertEqual(intervalkeygenerator(date(2016, 2, 28), date(2016, 3, 1), intervals.DAY), [20160228, 20160229, 20160301])
+        self.assertEqual(intervalkeygenerator(date(2014, 1, 1), date(2016, 3, 1), intervals.YEAR), [2014, 2015, 2016])
+
+    def test_interval_keys_round_trip(self):
+        for i in intervals:
+            results = intervalgenerator(date(2011, 1, 1), date(2016, 12, 31), i, is_fixed=True)
+            begins = [r.begin_date.date().toordinal() for r in results]
+            keys = encode_interval_keys(begins, i)
+            self.assertEqual(keys, sorted(keys), "Keys are not sortable for " + str(i))
+            if(i != intervals.PART):
+                # the first interval may be partial, so only later intervals begin on their keyed calendar interval
+                self.assertEqual(decode_interval_keys(keys[1:], i), begins[1:], "Keys do not round trip for " + str(i))
+            self.assertEqual(encode_interval_keys(decode_interval_keys(keys, i), i), keys)
+
+    def test_interval_keys_week_start(self):
+        # weeks starting on Sunday must not share the ISO week key of the Monday after their start
+        keys = intervalkeygenerator(date(2016, 1, 6), date(2016, 1, 31), intervals.WEEK, is_fixed=True, week_start=calendar.SUNDAY)
+        self.assertEqual(keys, [201601, 201602, 201603, 201604, 201605])
+        for week_start in range(7):
+            results = intervalgenerator(date(2011, 1, 1), date(2016, 12, 31), intervals.WEEK, is_fixed=True, week_start=week_start)
+            begins = [r.begin_date.date().toordinal() for r in results]
+            keys = encode_interval_keys(begins, intervals.WEEK, week_start)
+            self.assertEqual(keys, sorted(set(keys)), "Keys are not unique and sortable for week_start " + str(week_start))
+            self.assertEqual(decode_interval_keys(keys[1:], intervals.WEEK, week_start), begins[1:])
+
+class EngineTest(TestCase):
+    """ Testing the rrule, fast and verify engines of intervalgenerator """
+
+    def differential_dates(self, rand):
+        """ Random begin and end dates or datetimes, biased toward month ends and leap years """
+        years = [1999, 2000, 2003, 2004, 2015, 2016, 2100]
+        year = rand.choice(years)
+        month = rand.randint(1, 12)
+        last_day = calendar.monthrange(year, month)[1]
+        if(rand.random() < 0.6):
+            begin_date = date(year, month, rand.choice([1, 28, last_day - 1, last_day]))
+        else:
+            begin_date = date(1995, 1, 1) + timedelta(days=rand.randrange(40000))
+        end_date = begin_date + timedelta(days=rand.choice([0, 1, 27, 28, 30, 31, 59, 365, 366, rand.randrange(3000)]))
+        if(rand.random() < 0.3):
+            # only the date portion may be used
+            begin_date = datetime.combine(begin_date, datetime.min.time()) + timedelta(hours=rand.randrange(24))
+            end_date = datetime.combine(end_date, datetime.min.time()) + timedelta(hours=rand.randrange(24))
+        return begin_date, end_date
+
+    def test_engines_differential(self):
+        """ Seeded randomized differential sweep of every intervals/interval_count/is_fixed combination """
+        rand = random.Random(33)
+        for _ in range(100):
+            begin_date, end_date = self.differential_dates(rand)
+            week_start = rand.choice([None, rand.randrange(7)])
+            for i in intervals:
+                for interval_count in (1, 2, 3, 5):
+                    for is_fixed in (False, True):
+                        try:
+                            results = intervalgenerator(begin_date, end_date, i, interval_count, is_fixed, week_start, engine='verify')
+                        except NotImplementedError:
+                            continue
+                        self.assertEqual(results, intervalgenerator(begin_date, end_date, i, interval_count, is_fixed, week_start, engine='fast'))
+
+    def test_engines_datetimes(self):
+        self.assertEqual(intervalgenerator(datetime(2016, 1, 1, 12), datetime(2016, 1, 10, 6), intervals.PART, 2, engine='verify'),
+            intervalgenerator(date(2016, 1, 1), date(2016, 1, 10), intervals.PART, 2))
+
+    def test_engines_month_end(self):
+        for begin_date in (date(2016, 1, 29), date(2016, 1, 30), date(2016, 1, 31), date(2016, 3, 31), date(2016, 2, 29)):
+            for i in (intervals.MONTH, intervals.QUARTER, intervals.YEAR):
+                for interval_count in (1, 2):
+                    self.assertEqual(intervalgenerator(begin_date, date(2024, 3, 1), i, interval_count, engine='fast'),
+                        intervalgenerator(begin_date, date(2024, 3, 1), i, interval_count, engine='rrule'))
+
+    def test_engine_verify_mismatch(self):
+        fast_engine = intervals_module._fastintervalordinals
+        def wrong_engine(*args):
+            begins, ends, partials = fast_engine(*args)
+            return begins, ends, [not p for p in partials]
+        intervals_module._fastintervalordinals = wrong_engine
+        try:
+            with self.assertRaises(RuntimeError):
+                intervalgenerator(date(2016, 1, 1), date(2016, 3, 15), intervals.MONTH, engine='verify')
+        finally:
+            intervals_module._fastintervalordinals = fast_engine
+
+        with self.assertRaises(ValueError):
+            intervalgenerator(date(2016, 1, 1), date(2016, 3, 15), intervals.MONTH, engine='other')
+        with self.assertRaises(NotImplementedError):
+            intervalgenerator(date(2016, 1, 1), date(2016, 1, 2), intervals.PART, interval_count=3, engine='verify')
+
+def _shared_worker(args):
+    """ multiprocessing worker for SharedIntervalsTest """
+    return sharedintervalgenerator(*args)
+
+@unittest.skipIf(intervals_module.shared_memory is None or os.name == 'nt', "POSIX multiprocessing.shared_memory is not available")
+class SharedIntervalsTest(TestCase):
+    """ Testing all things related to shared memory transport of intervals """
+
+    def test_shared_intervals(self):
+        expected_results = intervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.MONTH, is_fixed=True)
+        with SharedIntervals(sharedintervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.MONTH, is_fixed=True)) as shared:
+            try:
+                self.assertEqual(len(shared), len(expected_results))
+                self.assertEqual(shared.begins[0], date(2011, 1, 2).toordinal())
+                self.assertEqual(shared.ends[-1], date(2015, 10, 31).toordinal())
+                self.assertEqual(list(shared.partials), [r.is_partial for r in expected_results])
+                self.assertEqual(shared.results(), expected_results)
+            finally:
+                shared.unlink()
+
+        with SharedIntervals(share_intervals([], [], [])) as shared:
+            self.assertEqual(shared.results(), [])
+            shared.unlink()
+
+    def test_shared_intervals_multiprocessing(self):
+        requests = [(date(2011, 1, 1), date(2016, 12, 31), i) for i in (intervals.DAY, intervals.WEEK, intervals.QUARTER)]
+        pool = multiprocessing.Pool(2)
+        try:
+            names = pool.map(_shared_worker, requests)
+        finally:
+            pool.close()
+            pool.join()
+
+        for name, request in zip(names, requests):
+            with SharedIntervals(name) as shared:
+                try:
+                    self.assertEqual(shared.results(), intervalgenerator(*request))
+                finally:
+                    shared.unlink()
+
+class PlanBatchesTest(TestCase):
+    """ Testing all things related to the plan_batches function """
+
+    def assert_batches(self, batches, expected_ranges):
+        self.assertEqual([(b[0].begin_date.date(), b[-1].end_date.date()) for b in batches], expected_ranges)
+
+    def test_batches_max_days(self):
+        results = intervalgenerator(date(2016, 1, 1), date(2016, 1, 10), intervals.DAY)
+        self.assert_batches(plan_batches(results, max_days=4), [
+            (date(2016, 1, 1), date(2016, 1, 4)),
+            (date(2016, 1, 5), date(2016, 1, 8)),
+            (date(2016, 1, 9), date(2016, 1, 10)),
+        ])
+
+        # an interval longer than the cap is a batch of its own
+        results = intervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.MONTH)
+        batches = list(plan_batches(results, max_days=20))
+        self.assertEqual(len(batches), 12)
+        self.assertEqual([len(b) for b in batches], [1] * 12)
+
+    def test_batches_max_intervals_and_cost(self):
+        results = intervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.MONTH)
+        self.assert_batches(plan_batches(results, max_intervals=5), [
+            (date(2016, 1, 1), date(2016, 5, 31)),
+            (date(2016, 6, 1), date(2016, 10, 31)),
+            (date(2016, 11, 1), date(2016, 12, 31)),
+        ])
+
+        # batches stream from a generator input and respect whichever cap is hit first
+        windows = windowintervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.MONTH, 1)
+        day_count = lambda r: (r.end_date - r.begin_date).days + 1
+        self.assert_batches(plan_batches(windows, max_intervals=4, max_cost=91, cost=day_count), [
+            (date(2016, 1, 1), date(2016, 3, 31)),
+            (date(2016, 4, 1), date(2016, 6, 30)),
+            (date(2016, 7, 1), date(2016, 8, 31)),
+            (date(2016, 9, 1), date(2016, 11, 30)),
+            (date(2016, 12, 1), date(2016, 12, 31)),
+        ])
+
+        self.assertEqual(list(plan_batches([], max_intervals=2)), [])
+        with self.assertRaises(ValueError):
+            list(plan_batches(results))
+        with self.assertRaises(ValueError):
+            list(plan_batches(results, max_cost=3))
+
+class ZonedIntervalGeneratorTest(TestCase):
+    """ Testing all things related to time zone-aware intervals """
+
+    def test_zoned_intervals_dst(self):
+        # 2016-03-13 and 2016-11-06 are DST transition days in New York
+        results = zonedintervalgenerator(date(2016, 3, 12), date(2016, 3, 14), intervals.DAY, 'America/New_York', utc=True)
+        self.assertEqual([(r.begin.isoformat(), r.end.isoformat(), r.is_partial) for r in results], [
+            ('2016-03-12T05:00:00+00:00', '2016-03-13T05:00:00+00:00', False),
+            ('2016-03-13T05:00:00+00:00', '2016-03-14T04:00:00+00:00', False),
+            ('2016-03-14T04:00:00+00:00', '2016-03-15T04:00:00+00:00', False),
+        ])
+
+        results = zonedintervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.MONTH, 'America/New_York', is_fixed=True)
+        self.assertEqual(len(results), 12)
+        self.assertEqual(results[10].begin.isoformat(), '2016-11-01T00:00:00-04:00')
+        self.assertEqual(results[10].end.isoformat(), '2016-12-01T00:00:00-05:00')
+        self.assertEqual(results[10].end, results[11].begin)
+
+    def test_zoned_intervals_match_per_boundary_conversion(self):
+        def instant(dt):
+            return calendar.timegm(dt.utctimetuple())
+
+        for tz in ('Europe/London', 'Australia/Lord_Howe', 'America/Havana', 'Asia/Kolkata'):
+            results = zonedintervalgenerator(date(2014, 12, 25), date(2017, 1, 5), intervals.DAY, tz, utc=True)
+            zoned = zonedintervalgenerator(date(2014, 12, 25), date(2017, 1, 5), intervals.DAY, tz)
+            self.assertEqual(len(results), len(zoned))
+            for result, zoned_result in zip(results, zoned):
+                # compare as instants, since aware datetimes in a DST gap never compare equal across zones
+                self.assertEqual(instant(result.begin), instant(zoned_result.begin), tz)
+                self.assertEqual(instant(result.end), instant(zoned_result.end), tz)
+                self.assertEqual(result.begin.utcoffset(), timedelta(0))
+
+        with self.assertRaises(ValueError):
+            zonedintervalgenerator(date(2016, 1, 1), date(2016, 1, 2), intervals.DAY, 'Not/A_Zone')
+
+@unittest.skipIf(not intervals_module._COLUMNAR_SUPPORTED, "memoryview.cast is not available")
+class ColumnarIntervalsTest(TestCase):
+    """ Testing all things related to ColumnarIntervals """
+
+    def test_columnar_intervals(self):
+        expected_results = intervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.QUARTER, is_fixed=True)
+        columnar = columnarintervalgenerator(date(2011, 1, 2), date(2015, 10, 31), intervals.QUARTER, is_fixed=True)
+
+        self.assertEqual(len(columnar), len(expected_results))
+        self.assertEqual((columnar.begins.format, columnar.ends.format, columnar.partials.format), ('i', 'i', 'B'))
+        self.assertEqual(columnar.begins[0], date(2011, 1, 2).toordinal())
+        self.assertEqual(list(columnar.partials), [1 if r.is_partial else 0 for r in expected_results])
+        self.assertEqual(columnar.results(), expected_results)
+
+        begins = array('i')
+        begins.frombytes(columnar.begins.cast('B'))
+        self.assertEqual(begins.tolist(), [r.begin_date.date().toordinal() for r in expected_results])
+
+        # wrapping any buffer in the same layout reads it back without copying
+        wrapped = ColumnarIntervals(bytes(columnar.buffer))
+        self.assertEqual(wrapped.results(), expected_results)
+        self.assertEqual(len(ColumnarIntervals.from_ordinals([], [], [])), 0)
+
+    def test_columnar_intervals_file(self):
+        columnar = columnarintervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.WEEK, is_fixed=True)
+        with tempfile.TemporaryFile() as f:
+            columnar.tofile(f)
+            f.flush()
+            self.assertEqual(f.tell(), columnar.nbytes)
+
+            with ColumnarIntervals.fromfile(f) as mapped:
+                self.assertEqual(list(mapped.begins), list(columnar.begins))
+                self.assertEqual(list(mapped.ends), list(columnar.ends))
+                self.assertEqual(mapped.results(), columnar.results())
+
+    def test_columnar_intervals_truncated(self):
+        columnar = columnarintervalgenerator(date(2016, 1, 1), date(2016, 12, 31), intervals.MONTH)
+        data = bytes(columnar.buffer)
+        for length in (0, 4, len(data) - 1):
+            with self.assertRaises(ValueError):
+                ColumnarIntervals(data[:length])
+
+        with tempfile.TemporaryFile() as f:
+            with self.assertRaises(ValueError):
+                ColumnarIntervals.fromfile(f)
+            f.write(data[:-1])
+            f.flush()
+            with self.assertRaises(ValueError):
+                ColumnarIntervals.fromfile(f)
+
+class RRuleIntervalGeneratorTest(TestCase):
+    """ Testing all things related to compiled iCalendar RRULE interval plans """
+
+    def test_rrule_intervals(self):
+        results = rruleintervalgenerator('FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=-1', date(2016, 1, 15), date(2016, 5, 31))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 15), end_date=date(2016, 1, 30), is_partial=True),
+            IntervalResult(begin_date=date(2016, 1, 31), end_date=date(2016, 3, 30), is_partial=False),
+            IntervalResult(begin_date=date(2016, 3, 31), end_date=date(2016, 5, 30), is_partial=False),
+            IntervalResult(begin_date=date(2016, 5, 31), end_date=date(2016, 5, 31), is_partial=True),
+        ]
+        self.assertEqual(results, expected_results)
+
+        # exotic rules fall back on dateutil.rrule: the first Monday of each month
+        plan = compile_rrule('RRULE:FREQ=MONTHLY;BYDAY=1MO')
+        self.assertFalse(plan.is_fast(date(2016, 1, 1)))
+        expected_results = [
+            IntervalResult(begin_date=date(2016, 1, 1), end_date=date(2016, 1, 3), is_partial=True),
+            IntervalResult(begin_date=date(2016, 1, 4), end_date=date(2016, 1, 31), is_partial=False),
+            IntervalResult(begin_date=date(2016, 2, 1), end_date=date(2016, 3, 6), is_partial=False),
+            IntervalResult(begin_date=date(2016, 3, 7), end_date=date(2016, 3, 10), is_partial=True),
+        ]
+        self.assertEqual(plan.generate(date(2016, 1, 1), date(2016, 3, 10)), expected_results)
+
+    def test_rrule_fixed_shapes(self):
+        shapes = [
+            ('FREQ=YEARLY;BYMONTH=1;BYMONTHDAY=1', intervals.YEAR, None),
+            ('FREQ=YEARLY;BYYEARDAY=1', intervals.YEAR, None),
+            ('FREQ=MONTHLY;BYMONTHDAY=1', intervals.MONTH, None),
+            ('FREQ=WEEKLY;BYDAY=SU', intervals.WEEK, calendar.SUNDAY),
+        ]
+        for rule, i, week_start in shapes:
+            self.assertTrue(compile_rrule(rule).is_fast(date(2011, 1, 2)))
+            self.assertEqual(rruleintervalgenerator(rule, date(2011, 1, 2), date(2015, 10, 31)),
+                intervalgenerator(date(2011, 1, 2), date(2015, 10, 31), i, is_fixed=True, week_start=week_start), rule)
+
+    def test_rrule_fast_matches_fallback(self):
+        rules = [
+            'FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=-1', 'FREQ=MONTHLY;BYMONTHDAY=1', 'FREQ=WEEKLY;BYDAY=MO;WKST=SU',
+            'FREQ=DAILY;INTERVAL=3', 'FREQ=YEARLY', 'FREQ=YEARLY;INTERVAL=2', 'FREQ=MONTHLY;INTERVAL=5', 'FREQ=WEEKLY;INTERVAL=2',
+        ]
+        rand = random.Random(38)
+        for _ in range(60):
+            begin_date = rand.choice([date(2016, 2, 29), date(2016, 3, 1), date(2015, 1, 31), date(1996, 1, 1) + timedelta(days=rand.randrange(10000))])
+            end_date = begin_date + timedelta(days=rand.choice([0, 1, 30, rand.randrange(4000)]))
+            for rule in rules:
+                self.assertEqual(compile_rrule(rule).ordinals(begin_date, end_date), IntervalPlan(rule, fast=False).ordinals(begin_date, end_date),
+                    "Fast and rrule plans differ for " + str((rule, begin_date, end_date)))
+
+        # the next occurrence may be centuries away (February 29 every 25 years falls in 2400) or past date.max
+        edge_cases = [
+            ('FREQ=YEARLY;INTERVAL=25', date(2000, 2, 29), date(2001, 1, 1)),
+            ('FREQ=DAILY', date(9999, 12, 1), date(9999, 12, 31)),
+            ('FREQ=MONTHLY;BYMONTHDAY=-1', date(9999, 1, 15), date(9999, 12, 31)),
+            ('FREQ=YEARLY', date(9990, 6, 1), date(9999, 12, 31)),
+        ]
+        for rule, begin_date, end_date in edge_cases:
+            self.assertEqual(compile_rrule(rule).ordinals(begin_date, end_date), IntervalPlan(rule, fast=False).ordinals(begin_date, end_date),
+                "Fast and rrule plans differ for " + str((rule, begin_date, end_date)))
+        self.assertEqual(rruleintervalgenerator('FREQ=YEARLY;INTERVAL=25', date(2000, 2, 29), date(2001, 1, 1)),
+            [IntervalResult(begin_date=date(2000, 2, 29), end_date=date(2001, 1, 1), is_partial=True)])
+
+    def test_rrule_cache(self):
+        self.assertIs(compile_rrule('FREQ=DAILY;INTERVAL=2'), compile_rrule('FREQ=DAILY;INTERVAL=2'))
+        with self.assertRaises(ValueError):
+            compile_rrule('FREQ=SOMETIMES')
+        # EXDATE and RDATE lines make a set of recurrences rather than a single rule
+        with self.assertRaises(ValueError):
+            compile_rrule('RRULE:FREQ=MONTHLY\nEXDATE:20160201T000000')